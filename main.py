@@ -1,3 +1,6 @@
+import asyncio
+import contextlib
+
 from fastapi import FastAPI, Request, status, Depends
 from starlette.responses import JSONResponse
 from slowapi.errors import RateLimitExceeded
@@ -6,16 +9,33 @@ from slowapi.util import get_remote_address
 from slowapi.middleware import SlowAPIMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from src.api import contacts, auth, users
+from src.conf.log import setup_logging
 from src.schemas import User
 from src.services.auth import get_current_admin_user
+from src.services.mail import start_mail_worker
 
 origins = [
     "<http://localhost:3000>"
 ]
 
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Логи пишуться у фоновому потоці, щоб не блокувати event loop
+    log_listener = setup_logging()
+    log_listener.start()
+    # Фоновий воркер тримає одне SMTP-з'єднання і відправляє листи з черги
+    mail_task = start_mail_worker()
+    yield
+    mail_task.cancel()
+    # Збій воркера вже залоговано в on_mail_worker_done, тож він не повинен зривати зупинку застосунку
+    await asyncio.gather(mail_task, return_exceptions=True)
+    log_listener.stop()
+
+
 # Ініціалізація FastAPI
 limiter = Limiter(key_func=get_remote_address)
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 
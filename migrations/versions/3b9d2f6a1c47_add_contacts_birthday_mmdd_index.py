@@ -0,0 +1,31 @@
+"""add contacts birthday mmdd index
+
+Revision ID: 3b9d2f6a1c47
+Revises: c6120fed48e8
+Create Date: 2026-10-15 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2f6a1c47'
+down_revision: Union[str, None] = 'c6120fed48e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_contacts_user_id_birthday_mmdd',
+        'contacts',
+        ['user_id', sa.text('(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday))')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birthday_mmdd', table_name='contacts')
@@ -0,0 +1,36 @@
+"""add contacts trigram indexes
+
+Revision ID: 8e41c0d7b2a5
+Revises: 3b9d2f6a1c47
+Create Date: 2026-10-15 10:48:05.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41c0d7b2a5'
+down_revision: Union[str, None] = '3b9d2f6a1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in ('first_name', 'last_name', 'email'):
+        op.create_index(
+            f'ix_contacts_{column}_trgm',
+            'contacts',
+            [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    for column in ('first_name', 'last_name', 'email'):
+        op.drop_index(f'ix_contacts_{column}_trgm', table_name='contacts')
@@ -0,0 +1,26 @@
+"""add contacts user_id id index
+
+Revision ID: a17f5e93c2d8
+Revises: 8e41c0d7b2a5
+Create Date: 2026-10-15 11:27:53.640981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a17f5e93c2d8'
+down_revision: Union[str, None] = '8e41c0d7b2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_user_id_id', 'contacts', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_id', table_name='contacts')
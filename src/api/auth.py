@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from redis import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.cache.redis_client import redis_client
+from src.conf.config import config
 from src.database.db import get_db
 from src.schemas import UserCreate, Token, User, RequestEmail
 from src.services.auth import create_access_token, get_email_from_token, create_reset_token, decode_reset_token
@@ -11,11 +15,19 @@ from src.services.mail import send_email, send_reset_password_email
 from src.services.users import UserService
 
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 
 templates = Jinja2Templates(directory="src/services/templates")
+# Скомпільовані шаблони зберігаються на диску між перезапусками воркерів.
+# У продакшні шаблони змінюються лише з деплоєм, тож перевіряти mtime на кожен рендер не потрібно
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+templates.env.auto_reload = config.TEMPLATES_AUTO_RELOAD
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Не частіше одного листа підтвердження на адресу за цей проміжок
+REQUEST_EMAIL_THROTTLE_SECONDS = 60
+
 
 # Реєстрація користувача
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
@@ -27,20 +39,20 @@ async def register_user(
 ):
     user_service = UserService(db)
 
-    email_user = await user_service.get_user_by_email(user_data.email)
-    if email_user:
+    existing_users = await user_service.get_user_by_email_or_username(user_data.email, user_data.username)
+    if any(existing.email == user_data.email for existing in existing_users):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Користувач з таким email вже існує",
         )
 
-    username_user = await user_service.get_user_by_username(user_data.username)
-    if username_user:
+    if existing_users:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Користувач з таким іменем вже існує",
         )
-    user_data.password = Hash().get_password_hash(user_data.password)
+    # Хешування важке для CPU, тому виконуємо його поза event loop
+    user_data.password = await run_in_threadpool(Hash().get_password_hash, user_data.password)
     new_user = await user_service.create_user(user_data)
 
     background_tasks.add_task(
@@ -57,7 +69,9 @@ async def login_user(
 ):
     user_service = UserService(db)
     user = await user_service.get_user_by_username(form_data.username)
-    if not user or not Hash().verify_password(form_data.password, user.hashed_password):
+    if not user or not await run_in_threadpool(
+            Hash().verify_password, form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неправильний логін або пароль",
@@ -68,6 +82,10 @@ async def login_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Електронна адреса не підтверджена",
         )
+    # Оновлюємо застарілий хеш (bcrypt або старі параметри Argon2) після успішного логіну
+    if Hash().needs_rehash(user.hashed_password):
+        hashed_password = await run_in_threadpool(Hash().get_password_hash, form_data.password)
+        await user_service.update_password(user.email, hashed_password)
     access_token = await create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -95,13 +113,23 @@ async def request_email(
         db: Session = Depends(get_db),
 ):
     user_service = UserService(db)
-    user = await user_service.get_user_by_email(body.email)
+    confirmation = await user_service.get_confirmation_status(body.email)
 
-    if user.confirmed:
+    if confirmation is None:
+        return {"message": "Перевірте свою електронну пошту для підтвердження"}
+    if confirmation.confirmed:
         return {"message": "Ваша електронна пошта вже підтверджена"}
-    if user:
+
+    try:
+        # Повторні кліки протягом хвилини не створюють нових листів
+        should_send = await redis_client.set(
+            f"request_email:{body.email}", 1, ex=REQUEST_EMAIL_THROTTLE_SECONDS, nx=True
+        )
+    except RedisError:
+        should_send = True
+    if should_send:
         background_tasks.add_task(
-            send_email, user.email, user.username, request.base_url
+            send_email, body.email, confirmation.username, request.base_url
         )
     return {"message": "Перевірте свою електронну пошту для підтвердження"}
 
@@ -149,6 +177,6 @@ async def reset_password(
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
     user_service = UserService(db)
-    hashed_password = Hash().get_password_hash(new_password)
+    hashed_password = await run_in_threadpool(Hash().get_password_hash, new_password)
     await user_service.update_password(email, hashed_password)
     return {"msg": "Password updated successfully"}
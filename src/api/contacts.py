@@ -15,11 +15,12 @@ router = APIRouter()
 async def contact_read(
         skip: int = 0,
         limit: int = 100,
+        after_id: Optional[int] = None,
         db: AsyncSession = Depends(get_db),
         user: User = Depends(get_current_user)
 ):
     contact_service = ContactService(db)
-    return await contact_service.get_contacts(user, skip, limit)
+    return await contact_service.get_contacts(user, skip, limit, after_id)
 
 
 @router.post("/", response_model=ContactRead, status_code=status.HTTP_201_CREATED)
@@ -41,6 +41,9 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_DB: int = 0
 
+    # Templates: enable in development to pick up template edits without a restart
+    TEMPLATES_AUTO_RELOAD: bool = False
+
     # DB connection string
     @property
     def DB_URL(self) -> str:
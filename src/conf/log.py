@@ -0,0 +1,36 @@
+import logging
+import logging.handlers
+import queue
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def setup_logging(level: int | None = None) -> logging.handlers.QueueListener:
+    """
+    Route all log records through a queue so that handler I/O runs in a background thread.
+
+    The handlers already configured on the root logger (e.g. by uvicorn ``--log-config``) are
+    moved behind the returned listener (not yet started), so logging never blocks the event loop.
+    A stderr handler is used only if the root logger has none. The root level is changed only
+    when ``level`` is given, and repeated calls reuse the same queue and listener.
+    """
+    global _listener
+
+    root_logger = logging.getLogger()
+    if level is not None:
+        root_logger.setLevel(level)
+
+    if _listener is None:
+        handlers = list(root_logger.handlers)
+        if not handlers:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+            handlers = [stream_handler]
+
+        log_queue = queue.SimpleQueue()
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    return _listener
@@ -2,7 +2,7 @@ import enum
 from datetime import date
 from typing import Optional
 
-from sqlalchemy import String, Date, Integer, Column, DateTime, func, ForeignKey, Boolean, Enum
+from sqlalchemy import String, Date, Integer, Column, DateTime, func, ForeignKey, Boolean, Enum, Index, extract, literal_column
 from sqlalchemy.orm import declarative_base, Mapped, mapped_column, relationship
 
 Base = declarative_base()
@@ -20,6 +20,26 @@ class Contact(Base):
     user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     user = relationship('User', backref="contacts")
 
+
+# День народження як число MMDD (напр. 1231), щоб шукати за діапазоном без урахування року.
+# Множник — літерал, а не параметр, інакше вираз у запиті не збігатиметься з індексом.
+contact_birthday_mmdd = (
+    extract("month", Contact.birthday) * literal_column("100") + extract("day", Contact.birthday)
+)
+Index("ix_contacts_user_id_birthday_mmdd", Contact.user_id, contact_birthday_mmdd)
+
+# Keyset-пагінація списку контактів користувача
+Index("ix_contacts_user_id_id", Contact.user_id, Contact.id)
+
+# Триграмні GIN-індекси (pg_trgm) для пошуку ilike '%...%'
+Index("ix_contacts_first_name_trgm", Contact.first_name,
+      postgresql_using="gin", postgresql_ops={"first_name": "gin_trgm_ops"})
+Index("ix_contacts_last_name_trgm", Contact.last_name,
+      postgresql_using="gin", postgresql_ops={"last_name": "gin_trgm_ops"})
+Index("ix_contacts_email_trgm", Contact.email,
+      postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"})
+
+
 class UserRole(enum.Enum):
     USER = "USER"
     ADMIN = "ADMIN"
@@ -1,12 +1,18 @@
-from datetime import datetime, timedelta
+import logging
+from datetime import date, timedelta
 
-from sqlalchemy import select, and_, extract, or_
+from sqlalchemy import insert, select, update, or_, any_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.models import Contact, User
+from src.database.models import Contact, User, contact_birthday_mmdd
 from src.schemas import ContactCreate, ContactUpdate
 from typing import List, Optional, Any, Coroutine, Sequence
 
+logger = logging.getLogger(__name__)
+
+# Колонки контакту, які дозволено змінювати через ContactUpdate
+CONTACT_UPDATABLE_COLUMNS = frozenset(column.name for column in Contact.__table__.columns) - {"id", "user_id"}
+
 
 class ContactRepository:
     """Repository class for managing contact records in the database."""
@@ -20,19 +26,29 @@ class ContactRepository:
             session (AsyncSession): The asynchronous SQLAlchemy session.
         """
 
-    async def get_contacts(self, user: User, skip: int, limit: int) -> Sequence[Contact]:
+    async def get_contacts(
+            self, user: User, skip: int, limit: int, after_id: Optional[int] = None
+    ) -> Sequence[Contact]:
         """
-        Retrieve a paginated list of contacts for the given user.
+        Retrieve a paginated list of contacts for the given user, ordered by ID.
+
+        When ``after_id`` is given, keyset pagination is used instead of ``skip``:
+        the query seeks straight to the next page on the (user_id, id) index.
 
         Args:
             user (User): The user whose contacts are requested.
-            skip (int): Number of records to skip.
+            skip (int): Number of records to skip (ignored when after_id is set).
             limit (int): Maximum number of records to return.
+            after_id (Optional[int]): ID of the last contact on the previous page.
 
         Returns:
             Sequence[Contact]: List of contact objects.
         """
-        stmt = select(Contact).where(Contact.user_id == user.id).offset(skip).limit(limit)
+        stmt = select(Contact).where(Contact.user_id == user.id).order_by(Contact.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(Contact.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
         contacts = await self.db.execute(stmt)
         return contacts.scalars().all()
 
@@ -62,15 +78,19 @@ class ContactRepository:
         Returns:
             Optional[Contact]: The created contact, or None if creation fails.
         """
-        new_contact = Contact(**contact_data.model_dump(exclude_unset=True), user_id=user.id)
-        self.db.add(new_contact)
+        stmt = (
+            insert(Contact)
+            .values(**contact_data.model_dump(exclude_unset=True), user_id=user.id)
+            .returning(Contact)
+        )
         try:
+            result = await self.db.execute(stmt)
+            new_contact = result.scalar_one()
             await self.db.commit()
-            await self.db.refresh(new_contact)
             return new_contact
-        except IntegrityError as e:
+        except IntegrityError:
             await self.db.rollback()
-            print(f"DB error while creating contact: {e}")
+            logger.exception("DB error while creating contact")
             return None
 
     async def update_contact(self, contact_id: int, contact_data: ContactUpdate, user: User) -> Optional[Contact]:
@@ -85,18 +105,28 @@ class ContactRepository:
         Returns:
             Optional[Contact]: Updated contact object, or None if update fails or contact not found.
         """
-        contact = await self.get_contact(contact_id, user)
-        if contact:
-            for key, value in contact_data.dict(exclude_unset=True).items():
-                setattr(contact, key, value)
-            try:
-                await self.db.commit()
-                await self.db.refresh(contact)
-            except IntegrityError as e:
-                await self.db.rollback()
-                # Можеш залогувати або пробросити далі
-                print(f"DB error while updating contact: {e}")
-                return None
+        updates = {
+            key: value
+            for key, value in contact_data.model_dump(exclude_unset=True).items()
+            if key in CONTACT_UPDATABLE_COLUMNS
+        }
+        if not updates:
+            return await self.get_contact(contact_id, user)
+
+        stmt = (
+            update(Contact)
+            .where(Contact.id == contact_id, Contact.user_id == user.id)
+            .values(**updates)
+            .returning(Contact)
+        )
+        try:
+            result = await self.db.execute(stmt)
+            contact = result.scalar_one_or_none()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            logger.exception("DB error while updating contact")
+            return None
         return contact
 
     async def delete_contact(self, contact_id: int, user: User) -> Optional[Contact]:
@@ -140,6 +170,24 @@ class ContactRepository:
         contacts = await self.db.execute(stmt)
         return contacts.scalars().all()
 
+    async def search_contacts_batch(self, user: User, ids: List[int]) -> Sequence[Contact]:
+        """
+        Retrieve several contacts of the given user by their IDs in one query.
+
+        The IDs are bound as a single array parameter (``id = ANY(:ids)``), so PostgreSQL
+        reuses one cached plan regardless of how many IDs are requested.
+
+        Args:
+            user (User): The user who owns the contacts.
+            ids (List[int]): IDs of the contacts to retrieve.
+
+        Returns:
+            Sequence[Contact]: Contacts found among the requested IDs.
+        """
+        stmt = select(Contact).where(Contact.user_id == user.id, Contact.id == any_(ids))
+        contacts = await self.db.execute(stmt)
+        return contacts.scalars().all()
+
     async def get_contacts_birthday_soon(self, user: User):
         """
         Retrieve contacts whose birthdays are within the next 7 days.
@@ -150,21 +198,18 @@ class ContactRepository:
         Returns:
             List[Contact]: List of contacts with upcoming birthdays.
         """
-        today = datetime.today()
+        today = date.today()
         seven_days_later = today + timedelta(days=7)
+        start_mmdd = today.month * 100 + today.day
+        end_mmdd = seven_days_later.month * 100 + seven_days_later.day
 
-        stmt = select(Contact).where(Contact.user_id == user.id).filter(
-            or_(
-                and_(
-                    extract('month', Contact.birthday) == today.month,
-                    extract('day', Contact.birthday) >= today.day
-                ),
-                and_(
-                    extract('month', Contact.birthday) == seven_days_later.month,
-                    extract('day', Contact.birthday) <= seven_days_later.day
-                )
-            )
-        )
+        if start_mmdd <= end_mmdd:
+            birthday_filter = contact_birthday_mmdd.between(start_mmdd, end_mmdd)
+        else:
+            # Вікно переходить через кінець року (напр. 28.12 - 04.01)
+            birthday_filter = or_(contact_birthday_mmdd >= start_mmdd, contact_birthday_mmdd <= end_mmdd)
+
+        stmt = select(Contact).where(Contact.user_id == user.id, birthday_filter)
 
         result = await self.db.execute(stmt)
         contacts = result.scalars().all()
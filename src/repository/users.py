@@ -1,4 +1,7 @@
-from sqlalchemy import select, update
+from typing import Sequence
+
+from sqlalchemy import Row, insert, select, update, or_
+from sqlalchemy.orm import load_only
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User, UserRole
@@ -41,7 +44,13 @@ class UserRepository:
         Returns:
             User | None: The user object if found, otherwise None.
         """
-        stmt = select(User).filter_by(username=username)
+        # Лише колонки, потрібні для логіну та схеми User (без created_at)
+        stmt = select(User).options(
+            load_only(
+                User.id, User.username, User.email, User.hashed_password,
+                User.avatar, User.role, User.confirmed,
+            )
+        ).filter_by(username=username)
         user = await self.db.execute(stmt)
         return user.scalar_one_or_none()
 
@@ -59,6 +68,39 @@ class UserRepository:
         user = await self.db.execute(stmt)
         return user.scalar_one_or_none()
 
+    async def get_user_by_email_or_username(self, email: str, username: str) -> Sequence[Row]:
+        """
+        Retrieve the email/username pairs of users matching either value in one query.
+
+        Args:
+            email (str): The email address to search for.
+            username (str): The username to search for.
+
+        Returns:
+            Sequence[Row]: Up to two rows with ``email`` and ``username`` columns.
+        """
+        stmt = (
+            select(User.email, User.username)
+            .where(or_(User.email == email, User.username == username))
+            .limit(2)
+        )
+        result = await self.db.execute(stmt)
+        return result.all()
+
+    async def get_confirmation_status(self, email: str) -> Row | None:
+        """
+        Retrieve only the username and confirmation flag of a user by email.
+
+        Args:
+            email (str): The email address to search for.
+
+        Returns:
+            Row | None: Row with ``username`` and ``confirmed`` columns, or None if no user has this email.
+        """
+        stmt = select(User.username, User.confirmed).where(User.email == email)
+        result = await self.db.execute(stmt)
+        return result.one_or_none()
+
     async def create_user(self, body: UserCreate, avatar: str = None) -> User:
         """
         Create a new user.
@@ -78,10 +120,10 @@ class UserRepository:
         user_data["avatar"] = avatar
         user_data["role"] = role  # додавання ролі
 
-        user = User(**user_data)
-        self.db.add(user)
+        stmt = insert(User).values(**user_data).returning(User)
+        result = await self.db.execute(stmt)
+        user = result.scalar_one()
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
     async def confirmed_email(self, email: str) -> None:
@@ -94,8 +136,8 @@ class UserRepository:
         Returns:
             None
         """
-        user = await self.get_user_by_email(email)
-        user.confirmed = True
+        stmt = update(User).where(User.email == email).values(confirmed=True)
+        await self.db.execute(stmt)
         await self.db.commit()
 
     async def update_avatar_url(self, email: str, url: str) -> User:
@@ -109,10 +151,10 @@ class UserRepository:
         Returns:
             User: The updated user object.
         """
-        user = await self.get_user_by_email(email)
-        user.avatar = url
+        stmt = update(User).where(User.email == email).values(avatar=url).returning(User)
+        result = await self.db.execute(stmt)
+        user = result.scalar_one()
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
     async def update_password(self, email: str, hashed_password: str):
@@ -1,10 +1,12 @@
-import json
+import time
+from functools import lru_cache
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from jose import JWTError, jwk, jwt
 from redis import RedisError
 from sqlalchemy.orm import Session
 
@@ -17,9 +19,60 @@ from src.services.users import UserService
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Ключ підпису будуємо один раз, а не розбираємо JWT_SECRET на кожен encode/decode
+jwt_key = jwk.construct(config.JWT_SECRET, config.JWT_ALGORITHM)
+
+# Токени з листів (підтвердження пошти, скидання пароля) — короткі підписані рядки без JWT.
+# Різні salt не дають використати токен підтвердження для скидання пароля і навпаки
+EMAIL_TOKEN_MAX_AGE_SECONDS = 7 * 24 * 3600
+RESET_TOKEN_MAX_AGE_SECONDS = 3600
+email_token_serializer = URLSafeTimedSerializer(config.JWT_SECRET, salt="email-confirm")
+reset_token_serializer = URLSafeTimedSerializer(config.JWT_SECRET, salt="reset-password")
+
+# Маркер у кеші для користувачів, яких немає в БД (негативне кешування)
+USER_NOT_FOUND_MARKER = "__none__"
+USER_NOT_FOUND_TTL_SECONDS = 30
+
+# Кеш перевірених токенів у межах процесу: token -> (exp, payload)
+DECODE_CACHE_MAXSIZE = 10_000
+DECODE_CACHE_LEEWAY_SECONDS = 5
+decode_cache: dict[str, tuple[float, dict]] = {}
+
+
+def decode_token(token: str) -> dict:
+    now = time.time()
+    cached = decode_cache.pop(token, None)
+    if cached is not None and cached[0] - now >= DECODE_CACHE_LEEWAY_SECONDS:
+        decode_cache[token] = cached
+        return cached[1]
+
+    payload = jwt.decode(token, jwt_key, algorithms=[config.JWT_ALGORITHM])
+    exp = payload.get("exp")
+    if exp is not None:
+        if len(decode_cache) >= DECODE_CACHE_MAXSIZE:
+            # Витісняємо найстаріший запис (dict зберігає порядок вставки)
+            decode_cache.pop(next(iter(decode_cache)))
+        decode_cache[token] = (exp, payload)
+    return payload
+
+
+ACCESS_TOKEN_BUCKET_SECONDS = 60
+
+
+@lru_cache(maxsize=4096)
+def encode_access_token(username: str, bucket: int) -> str:
+    # exp рахується від початку хвилинного інтервалу, тож токен у межах інтервалу однаковий
+    issued_at = datetime.fromtimestamp(bucket * ACCESS_TOKEN_BUCKET_SECONDS, UTC)
+    expire = issued_at + timedelta(seconds=config.JWT_EXPIRATION_SECONDS)
+    return jwt.encode({"sub": username, "exp": expire}, jwt_key, algorithm=config.JWT_ALGORITHM)
+
 
 # define a function to generate a new access token
 async def create_access_token(data: dict, expires_delta: Optional[int] = None):
+    if expires_delta is None and data.keys() == {"sub"}:
+        # Повторні логіни того самого користувача протягом хвилини отримують уже підписаний токен
+        return encode_access_token(data["sub"], int(time.time() // ACCESS_TOKEN_BUCKET_SECONDS))
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(UTC) + timedelta(seconds=expires_delta)
@@ -27,7 +80,7 @@ async def create_access_token(data: dict, expires_delta: Optional[int] = None):
         expire = datetime.now(UTC) + timedelta(seconds=config.JWT_EXPIRATION_SECONDS)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(
-        to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM
+        to_encode, jwt_key, algorithm=config.JWT_ALGORITHM
     )
     return encoded_jwt
 
@@ -42,9 +95,7 @@ async def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM]
-        )
+        payload = decode_token(token)
         username = payload["sub"]
         if username is None:
             raise credentials_exception
@@ -55,18 +106,26 @@ async def get_current_user(
 
     try:
         cached_user = await redis_client.get(cache_key)
+        if cached_user == USER_NOT_FOUND_MARKER:
+            raise credentials_exception
         if cached_user:
-            return User(**json.loads(cached_user))  # User = Pydantic model
+            # pydantic-core розбирає JSON і валідує модель за один прохід
+            return User.model_validate_json(cached_user)  # User = Pydantic model
     except RedisError:
         pass  # Redis недоступний — продовжуємо без кешу
 
     user_service = UserService(db)
     user = await user_service.get_user_by_username(username)
     if user is None:
+        try:
+            # Коротко кешуємо відсутність користувача, щоб не бити в БД на кожен запит
+            await redis_client.set(cache_key, USER_NOT_FOUND_MARKER, ex=USER_NOT_FOUND_TTL_SECONDS)
+        except RedisError:
+            pass
         raise credentials_exception
 
     try:
-        await redis_client.set(cache_key, json.dumps(User.model_validate(user).model_dump()), ex=3600)
+        await redis_client.set(cache_key, User.model_validate(user).model_dump_json(), ex=3600)
     except RedisError:
         pass  # Не змогли закешувати, але це не критично
 
@@ -78,22 +137,14 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-def create_email_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.now(UTC) + timedelta(days=7)
-    to_encode.update({"iat": datetime.now(UTC), "exp": expire})
-    token = jwt.encode(to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM)
-    return token
+def create_email_token(email: str) -> str:
+    return email_token_serializer.dumps(email)
 
 
 async def get_email_from_token(token: str):
     try:
-        payload = jwt.decode(
-            token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM]
-        )
-        email = payload["sub"]
-        return email
-    except JWTError as e:
+        return email_token_serializer.loads(token, max_age=EMAIL_TOKEN_MAX_AGE_SECONDS)
+    except BadSignature:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail="Неправильний токен для перевірки електронної пошти",
@@ -101,15 +152,8 @@ async def get_email_from_token(token: str):
 
 
 def create_reset_token(email: str) -> str:
-    expire = datetime.utcnow() + timedelta(hours=1)
-    payload = {
-        "sub": email,
-        "exp": expire,
-    }
-    token = jwt.encode(payload, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM)
-    return token
+    return reset_token_serializer.dumps(email)
 
 
 def decode_reset_token(token: str) -> str:
-    payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-    return payload.get("sub")
+    return reset_token_serializer.loads(token, max_age=RESET_TOKEN_MAX_AGE_SECONDS)
@@ -12,8 +12,10 @@ class ContactService:
         self.contact_repo = ContactRepository(db)
         self.db = db
 
-    async def get_contacts(self,  user: User, skip: int, limit: int) -> Sequence[Contact]:
-        return await self.contact_repo.get_contacts(user, skip, limit)
+    async def get_contacts(
+            self, user: User, skip: int, limit: int, after_id: Optional[int] = None
+    ) -> Sequence[Contact]:
+        return await self.contact_repo.get_contacts(user, skip, limit, after_id)
 
     async def get_contact(self, contact_id: int, user: User) -> Optional[Contact]:
         return await self.contact_repo.get_contact(contact_id, user)
@@ -31,3 +33,6 @@ class ContactService:
             self, user: User, first_name: Optional[str], last_name: Optional[str], email: Optional[str]
     ) -> list:
         return await self.contact_repo.search_contacts(user, first_name, last_name, email)
+
+    async def search_contacts_batch(self, user: User, ids: list[int]) -> Sequence[Contact]:
+        return await self.contact_repo.search_contacts_batch(user, ids)
@@ -1,11 +1,28 @@
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from passlib.context import CryptContext
 
+# Параметри Argon2id підбираються під цільовий хост: python -m argon2 -t 2 -m 65536 -p 1
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1, hash_len=32)
+
+# Старі bcrypt-хеші лише перевіряємо, після успішного логіну вони перехешовуються в Argon2id
+legacy_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-class Hash:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class Hash:
     def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except InvalidHashError:
+            return legacy_pwd_context.verify(plain_password, hashed_password)
+        except VerificationError:
+            return False
 
     def get_password_hash(self, password: str):
-        return self.pwd_context.hash(password)
\ No newline at end of file
+        return password_hasher.hash(password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        try:
+            return password_hasher.check_needs_rehash(hashed_password)
+        except InvalidHashError:
+            return True
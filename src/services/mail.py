@@ -1,10 +1,15 @@
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
 
-from src.services.auth import create_email_token
+from src.services.auth import create_email_token, create_reset_token
 from src.conf.config import config as settings
 
 conf = ConnectionConfig(
@@ -21,48 +26,139 @@ conf = ConnectionConfig(
     TEMPLATE_FOLDER=Path(__file__).parent / "templates",
 )
 
-async def send_email(email: EmailStr, username: str, host: str):
-    try:
-        token_verification = create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": token_verification,
-            },
-            subtype=MessageType.html,
+templates_env = conf.template_engine()
+
+logger = logging.getLogger(__name__)
+
+# Черга готових листів; їх відправляє mail_worker через одне SMTP-з'єднання
+mail_queue: asyncio.Queue[EmailMessage] = asyncio.Queue()
+
+
+def build_message(subject: str, email: EmailStr, template_name: str, template_body: dict) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = email
+    html = templates_env.get_template(template_name).render(**template_body)
+    message.set_content(html, subtype="html")
+    return message
+
+
+class SMTPConnection:
+    """Одне постійне SMTP-з'єднання, спільне для всіх відправок у процесі."""
+
+    def __init__(self, idle_check_seconds: float = 60):
+        self.client = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            username=settings.MAIL_USERNAME if settings.USE_CREDENTIALS else None,
+            password=settings.MAIL_PASSWORD if settings.USE_CREDENTIALS else None,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.VALIDATE_CERTS,
         )
+        self.lock = asyncio.Lock()
+        self.idle_check_seconds = idle_check_seconds
+        self.last_used = 0.0
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        print(err)
+    async def ensure_connected(self):
+        # Після простою перевіряємо з'єднання через NOOP, бо сервер міг його закрити
+        if self.client.is_connected and time.monotonic() - self.last_used > self.idle_check_seconds:
+            try:
+                await self.client.noop()
+            except aiosmtplib.SMTPException:
+                self.client.close()
+        if not self.client.is_connected:
+            await self.client.connect()
 
+    async def send_message(self, message: EmailMessage):
+        async with self.lock:
+            await self.ensure_connected()
+            try:
+                await self.client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # З'єднання обірвалось під час відправки — підключаємось заново і повторюємо один раз
+                self.client.close()
+                await self.client.connect()
+                await self.client.send_message(message)
+            self.last_used = time.monotonic()
 
-async def send_reset_password_email(email: EmailStr, username: str, host: str):
+    def close(self):
+        if self.client.is_connected:
+            self.client.close()
+
+
+smtp_connection = SMTPConnection()
+
+
+async def mail_worker():
     try:
-        # Створюємо токен для скидання пароля
-        token = create_email_token({"sub": email})
-
-        # Формуємо лінк для скидання пароля
-        reset_link = f"{host}api/auth/reset-password?token={token}"
-
-        # Створюємо повідомлення для відправки
-        message = MessageSchema(
-            subject="Скидання пароля",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "reset_link": reset_link,  # Передаємо правильний лінк для скидання пароля
-            },
-            subtype=MessageType.html,
-        )
+        while True:
+            message = await mail_queue.get()
+            try:
+                await smtp_connection.send_message(message)
+            except Exception:
+                # Помилка одного листа не повинна зупиняти воркер, інакше черга лише зростатиме
+                logger.exception("Error sending email to %s", message["To"])
+            finally:
+                mail_queue.task_done()
+    finally:
+        smtp_connection.close()
+
+
+def on_mail_worker_done(task: asyncio.Task):
+    # Воркер має працювати до завершення застосунку; будь-яка інша зупинка — помилка
+    if task.cancelled():
+        return
+    err = task.exception()
+    if err is not None:
+        logger.error("Mail worker stopped unexpectedly", exc_info=err)
+    else:
+        logger.error("Mail worker exited unexpectedly")
+
+
+def start_mail_worker() -> asyncio.Task:
+    global mail_queue
+    # Черга прив'язується до event loop, у якому її вперше чекали, тож для кожного запуску
+    # застосунку створюємо нову і переносимо в неї листи, що ще не були відправлені
+    previous_queue, mail_queue = mail_queue, asyncio.Queue()
+    while not previous_queue.empty():
+        mail_queue.put_nowait(previous_queue.get_nowait())
+    mail_task = asyncio.create_task(mail_worker())
+    mail_task.add_done_callback(on_mail_worker_done)
+    return mail_task
+
+
+async def send_email(email: EmailStr, username: str, host: str):
+    token_verification = create_email_token(email)
+    message = build_message(
+        "Confirm your email",
+        email,
+        "verify_email.html",
+        {
+            "host": host,
+            "username": username,
+            "token": token_verification,
+        },
+    )
+    mail_queue.put_nowait(message)
+
+
+async def send_reset_password_email(email: EmailStr, username: str, host: str):
+    # Створюємо токен для скидання пароля
+    token = create_reset_token(email)
+
+    # Формуємо лінк для скидання пароля
+    reset_link = f"{host}api/auth/reset-password?token={token}"
 
-        # Відправляємо email
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="reset_password.html")
-    except ConnectionErrors as err:
-        print(f"Error sending email: {err}")
+    message = build_message(
+        "Скидання пароля",
+        email,
+        "reset_password.html",
+        {
+            "host": host,
+            "username": username,
+            "reset_link": reset_link,  # Передаємо правильний лінк для скидання пароля
+        },
+    )
+    mail_queue.put_nowait(message)
@@ -28,6 +28,12 @@ class UserService:
     async def get_user_by_email(self, email: str):
         return await self.repository.get_user_by_email(email)
 
+    async def get_user_by_email_or_username(self, email: str, username: str):
+        return await self.repository.get_user_by_email_or_username(email, username)
+
+    async def get_confirmation_status(self, email: str):
+        return await self.repository.get_confirmation_status(email)
+
     async def confirmed_email(self, email: str):
         return await self.repository.confirmed_email(email)
 
@@ -5,11 +5,9 @@ from src.services.hash import Hash
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import asyncio
-
 import pytest
-import pytest_asyncio
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
@@ -18,7 +16,8 @@ from src.database.models import Base, User
 from src.database.db import get_db
 from src.services.auth import create_access_token
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+# БД у пам'яті: одне спільне з'єднання (StaticPool), свій екземпляр у кожному процесі/воркері
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -26,6 +25,18 @@ engine = create_async_engine(
     poolclass=StaticPool,
 )
 
+
+# Драйвер sqlite сам керує транзакціями і ламає SAVEPOINT — передаємо керування SQLAlchemy
+@event.listens_for(engine.sync_engine, "connect")
+def do_connect(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def do_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
 TestingSessionLocal = async_sessionmaker(
     autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
@@ -37,29 +48,62 @@ test_user = {
 }
 
 
-@pytest.fixture(scope="module", autouse=True)
-def init_models_wrap():
-    async def init_models():
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.drop_all)
-            await conn.run_sync(Base.metadata.create_all)
-        async with TestingSessionLocal() as session:
-            hash_password = Hash().get_password_hash(test_user["password"])
-            current_user = User(
-                username=test_user["username"],
-                email=test_user["email"],
-                hashed_password=hash_password,
-                confirmed=True,
-                avatar="<https://twitter.com/gravatar>",
-            )
-            session.add(current_user)
-            await session.commit()
+@pytest.fixture(scope="session", autouse=True)
+def anyio_backend():
+    # autouse: anyio запускає кожну async-тестову функцію без окремої позначки pytest.mark.anyio
+    return "asyncio"
 
-    asyncio.run(init_models())
+
+@pytest.fixture(scope="session", autouse=True)
+async def shared_event_loop(anyio_backend):
+    # Поки ця фікстура активна, раннер anyio не закривається, тож усі тести
+    # і фікстури сесії працюють в одному event loop
+    yield
+
+
+@pytest.fixture(scope="session")
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with TestingSessionLocal() as session:
+        hash_password = Hash().get_password_hash(test_user["password"])
+        current_user = User(
+            username=test_user["username"],
+            email=test_user["email"],
+            hashed_password=hash_password,
+            confirmed=True,
+            avatar="<https://twitter.com/gravatar>",
+        )
+        session.add(current_user)
+        await session.commit()
+
+    yield
+    await engine.dispose()
 
 
 @pytest.fixture(scope="module")
-def client():
+async def db_transaction(init_models):
+    # Усі сесії модуля працюють в одній зовнішній транзакції; commit у коді лише
+    # закриває SAVEPOINT, а після модуля все відкочується і наступний бачить чисту БД
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        TestingSessionLocal.configure(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield connection
+        finally:
+            TestingSessionLocal.configure(bind=engine, join_transaction_mode="conditional_savepoint")
+            await transaction.rollback()
+
+
+@pytest.fixture
+async def db_session(db_transaction):
+    """Сесія тестової БД для підготовки даних безпосередньо в тестах."""
+    async with TestingSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+async def client(init_models):
     # Dependency override
 
     async def override_get_db():
@@ -72,10 +116,20 @@ def client():
 
     app.dependency_overrides[get_db] = override_get_db
 
-    yield TestClient(app)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as async_client:
+        yield async_client
 
 
-@pytest_asyncio.fixture()
+@pytest.fixture(scope="session")
 async def get_token():
-    token = await create_access_token(data={"sub": test_user["username"]})
-    return token
+    # Токен створюється один раз за сесію напряму, без запиту на /login
+    return await create_access_token(data={"sub": test_user["username"]})
+
+
+@pytest.fixture(scope="session")
+async def warm_app(client, get_token):
+    """Прогріває застосунок і з'єднання з БД до першого тесту, щоб разова затримка не падала на нього."""
+    await client.get("/")
+    # /api/users/me обмежений лімітом запитів, тому прогріваємо через маршрут без ліміту,
+    # який так само проходить авторизацію і запит до БД
+    await client.get("/contacts/", headers={"Authorization": f"Bearer {get_token}"})
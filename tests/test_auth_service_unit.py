@@ -0,0 +1,219 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from itsdangerous import BadSignature, SignatureExpired
+from jose import JWTError, jwt
+
+from src.conf.config import config
+from src.services import auth
+
+
+def make_token(**claims):
+    return jwt.encode(claims, auth.jwt_key, algorithm=config.JWT_ALGORITHM)
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    # Порожній кеш для кожного тесту і лічильник справжніх перевірок підпису
+    monkeypatch.setattr(auth, "decode_cache", {})
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        calls.append(token)
+        return real_decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_decode_token_cache_hit_skips_jwt_decode(decode_calls):
+    token = make_token(sub="testuser", exp=int(time.time()) + 3600)
+
+    first = auth.decode_token(token)
+    second = auth.decode_token(token)
+
+    assert first == second == {"sub": "testuser", "exp": first["exp"]}
+    assert decode_calls == [token]
+
+
+def test_decode_token_reverifies_within_leeway(decode_calls):
+    exp = int(time.time()) + auth.DECODE_CACHE_LEEWAY_SECONDS - 2
+    token = make_token(sub="testuser", exp=exp)
+
+    auth.decode_token(token)
+    auth.decode_token(token)
+
+    assert decode_calls == [token, token]
+
+
+def test_decode_token_rejects_expired_cached_token(decode_calls):
+    exp = int(time.time()) - 10
+    token = make_token(sub="testuser", exp=exp)
+    # Запис залишився в кеші з часу, коли токен ще був дійсним
+    auth.decode_cache[token] = (exp, {"sub": "testuser", "exp": exp})
+
+    with pytest.raises(JWTError):
+        auth.decode_token(token)
+
+    assert token not in auth.decode_cache
+
+
+def test_decode_token_evicts_least_recently_used(decode_calls, monkeypatch):
+    monkeypatch.setattr(auth, "DECODE_CACHE_MAXSIZE", 2)
+    exp = int(time.time()) + 3600
+    first, second, third = (make_token(sub=name, exp=exp) for name in ("first", "second", "third"))
+
+    auth.decode_token(first)
+    auth.decode_token(second)
+    auth.decode_token(first)  # влучання переносить запис у кінець черги на витіснення
+    auth.decode_token(third)
+
+    assert list(auth.decode_cache) == [first, third]
+
+
+def test_decode_token_does_not_cache_token_without_exp(decode_calls):
+    token = make_token(sub="testuser")
+
+    auth.decode_token(token)
+    auth.decode_token(token)
+
+    assert auth.decode_cache == {}
+    assert decode_calls == [token, token]
+
+
+@pytest.fixture
+def redis_stub(monkeypatch):
+    # Redis у тестах недоступний, тож підміняємо лише потрібні методи клієнта
+    get = AsyncMock(return_value=None)
+    set_ = AsyncMock(return_value=True)
+    monkeypatch.setattr("src.services.auth.redis_client.get", get)
+    monkeypatch.setattr("src.services.auth.redis_client.set", set_)
+    return get, set_
+
+
+@pytest.fixture
+def get_user_by_username(monkeypatch):
+    mock = AsyncMock(return_value=None)
+    monkeypatch.setattr(auth.UserService, "get_user_by_username", mock)
+    return mock
+
+
+async def test_get_current_user_caches_missing_user(redis_stub, get_user_by_username):
+    _, redis_set = redis_stub
+    token = make_token(sub="ghost", exp=int(time.time()) + 3600)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.get_current_user(token, db=MagicMock())
+
+    assert exc_info.value.status_code == 401
+    get_user_by_username.assert_awaited_once_with("ghost")
+    redis_set.assert_awaited_once_with(
+        "user:ghost", auth.USER_NOT_FOUND_MARKER, ex=auth.USER_NOT_FOUND_TTL_SECONDS
+    )
+    assert auth.USER_NOT_FOUND_TTL_SECONDS == 30
+
+
+async def test_get_current_user_marker_skips_database(redis_stub, get_user_by_username):
+    redis_get, redis_set = redis_stub
+    redis_get.return_value = auth.USER_NOT_FOUND_MARKER
+    token = make_token(sub="ghost", exp=int(time.time()) + 3600)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.get_current_user(token, db=MagicMock())
+
+    assert exc_info.value.status_code == 401
+    redis_get.assert_awaited_once_with("user:ghost")
+    get_user_by_username.assert_not_awaited()
+    redis_set.assert_not_awaited()
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    # Керований годинник для auth.create_access_token; кеш підписаних токенів очищаємо
+    auth.encode_access_token.cache_clear()
+    now = [1_700_000_050.0]  # 10 с від початку хвилинного інтервалу
+    monkeypatch.setattr(auth.time, "time", lambda: now[0])
+    yield now
+    auth.encode_access_token.cache_clear()
+
+
+def token_claims(token):
+    return jwt.get_unverified_claims(token)
+
+
+async def test_create_access_token_reuses_token_within_bucket(frozen_time):
+    first = await auth.create_access_token(data={"sub": "testuser"})
+    frozen_time[0] += 30
+    second = await auth.create_access_token(data={"sub": "testuser"})
+
+    assert second == first
+
+
+async def test_create_access_token_new_token_in_next_bucket(frozen_time):
+    first = await auth.create_access_token(data={"sub": "testuser"})
+    frozen_time[0] += auth.ACCESS_TOKEN_BUCKET_SECONDS
+    second = await auth.create_access_token(data={"sub": "testuser"})
+
+    assert second != first
+    assert token_claims(second)["exp"] - token_claims(first)["exp"] == auth.ACCESS_TOKEN_BUCKET_SECONDS
+
+
+async def test_create_access_token_exp_counts_from_bucket_start(frozen_time):
+    token = await auth.create_access_token(data={"sub": "testuser"})
+
+    bucket_start = int(frozen_time[0] // auth.ACCESS_TOKEN_BUCKET_SECONDS) * auth.ACCESS_TOKEN_BUCKET_SECONDS
+    assert token_claims(token) == {"sub": "testuser", "exp": bucket_start + config.JWT_EXPIRATION_SECONDS}
+
+
+async def test_create_access_token_custom_claims_bypass_cache(frozen_time):
+    cached = await auth.create_access_token(data={"sub": "testuser"})
+
+    with_delta = await auth.create_access_token(data={"sub": "testuser"}, expires_delta=120)
+    with_claims = await auth.create_access_token(data={"sub": "testuser", "scope": "reset"})
+
+    assert with_delta != cached
+    assert with_claims != cached
+    assert token_claims(with_claims)["scope"] == "reset"
+    assert auth.encode_access_token.cache_info().currsize == 1
+
+
+def test_reset_token_round_trip():
+    assert auth.decode_reset_token(auth.create_reset_token("user@example.com")) == "user@example.com"
+
+
+async def test_email_token_round_trip():
+    assert await auth.get_email_from_token(auth.create_email_token("user@example.com")) == "user@example.com"
+
+
+async def test_email_and_reset_tokens_are_not_interchangeable():
+    with pytest.raises(BadSignature):
+        auth.decode_reset_token(auth.create_email_token("user@example.com"))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.get_email_from_token(auth.create_reset_token("user@example.com"))
+    assert exc_info.value.status_code == 422
+
+
+def issued_ago(monkeypatch, create_token, seconds):
+    # itsdangerous бере час підпису з time.time(), тож підписуємо токен «у минулому»
+    with monkeypatch.context() as patched:
+        patched.setattr(time, "time", lambda now=time.time(): now - seconds)
+        return create_token("user@example.com")
+
+
+async def test_expired_email_token_is_rejected(monkeypatch):
+    token = issued_ago(monkeypatch, auth.create_email_token, auth.EMAIL_TOKEN_MAX_AGE_SECONDS + 10)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await auth.get_email_from_token(token)
+    assert exc_info.value.status_code == 422
+
+
+def test_expired_reset_token_is_rejected(monkeypatch):
+    token = issued_ago(monkeypatch, auth.create_reset_token, auth.RESET_TOKEN_MAX_AGE_SECONDS + 10)
+
+    with pytest.raises(SignatureExpired):
+        auth.decode_reset_token(token)
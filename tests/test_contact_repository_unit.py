@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User, Contact
@@ -10,6 +11,13 @@ from src.repository.contacts import ContactRepository
 from src.schemas import ContactCreate, ContactUpdate
 
 
+def async_return(value):
+    """Корутина-заглушка для session.execute там, де виклики не перевіряються."""
+    async def stub(*args, **kwargs):
+        return value
+    return stub
+
+
 @pytest.fixture
 def mock_session():
     mock_session = AsyncMock(spec=AsyncSession)
@@ -26,12 +34,11 @@ def user():
     return User(id=1, username="testuser")
 
 
-@pytest.mark.asyncio
 async def test_get_contacts(contact_repository, mock_session, user):
     # Setup mock
     mock_result = MagicMock()
     mock_result.scalars.return_value.all.return_value = [Contact(id=1, first_name="test contact", user=user)]
-    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.execute = async_return(mock_result)
 
     # Call method
     contacts = await contact_repository.get_contacts(skip=0, limit=10, user=user)
@@ -41,12 +48,31 @@ async def test_get_contacts(contact_repository, mock_session, user):
     assert contacts[0].first_name == "test contact"
 
 
-@pytest.mark.asyncio
+async def test_get_contacts_after_id(contact_repository, mock_session, user):
+    # Setup mock
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [Contact(id=11, first_name="next page", user=user)]
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    # Call method
+    contacts = await contact_repository.get_contacts(user=user, skip=0, limit=10, after_id=10)
+
+    # Assertions
+    assert [contact.id for contact in contacts] == [11]
+    # Наступна сторінка шукається за індексом (user_id, id), а не пропуском рядків через OFFSET
+    compiled = mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "contacts.id > %(id_1)s" in sql
+    assert "ORDER BY contacts.id" in sql
+    assert "OFFSET" not in sql
+    assert compiled.params["id_1"] == 10
+
+
 async def test_get_contact(contact_repository, mock_session, user):
     # Setup mock
     mock_result = MagicMock()
     mock_result.scalar_one_or_none.return_value = Contact(id=1, first_name="test contact", user=user)
-    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_session.execute = async_return(mock_result)
 
     # Call method
     contact = await contact_repository.get_contact(contact_id=1, user=user)
@@ -57,7 +83,6 @@ async def test_get_contact(contact_repository, mock_session, user):
     assert contact.first_name == "test contact"
 
 
-@pytest.mark.asyncio
 async def test_create_contact(contact_repository, mock_session, user):
     # Arrange
     contact_data = ContactCreate(
@@ -69,11 +94,12 @@ async def test_create_contact(contact_repository, mock_session, user):
         extra_info="Test contact"
     )
 
-    # Щоб симулювати commit/refresh
-    mock_session.commit = AsyncMock()
-    mock_session.refresh = AsyncMock()
-    mock_session.rollback = AsyncMock()
-    mock_session.add = MagicMock()
+    # Симулюємо результат INSERT ... RETURNING
+    mock_result = MagicMock()
+    mock_result.scalar_one.return_value = Contact(
+        id=1, **contact_data.model_dump(exclude_unset=True), user_id=user.id
+    )
+    mock_session.execute = AsyncMock(return_value=mock_result)
 
     # Act
     result = await contact_repository.create_contact(contact_data=contact_data, user=user)
@@ -84,12 +110,15 @@ async def test_create_contact(contact_repository, mock_session, user):
     assert result.first_name == "John"
     assert result.user_id == user.id
 
-    mock_session.add.assert_called_once()
+    params = mock_session.execute.call_args.args[0].compile().params
+    assert params["first_name"] == "John"
+    assert params["user_id"] == user.id
+
     mock_session.commit.assert_called_once()
-    mock_session.refresh.assert_called_once()
+    mock_session.add.assert_not_called()
+    mock_session.refresh.assert_not_called()
 
 
-@pytest.mark.asyncio
 async def test_update_contact(contact_repository, mock_session, user):
     contact_data = ContactUpdate(
         first_name="John",
@@ -100,19 +129,21 @@ async def test_update_contact(contact_repository, mock_session, user):
         extra_info="New info"
     )
 
-    existing_contact = Contact(
+    updated_contact = Contact(
         id=1,
-        first_name="Jane",
-        last_name="Smith",
-        email="jane@example.com",
-        phone="0987654321",
-        birthday=datetime(1990, 5, 20),
-        extra_info="Old info",
+        first_name="John",
+        last_name="Doe",
+        email="john@example.com",
+        phone="1234567890",
+        birthday=datetime(2000, 1, 12),
+        extra_info="New info",
         user_id=user.id
     )
 
-    # Мокаємо get_contact, щоб повертав об'єкт Contact
-    contact_repository.get_contact = AsyncMock(return_value=existing_contact)
+    # Мокаємо результат UPDATE ... RETURNING
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = updated_contact
+    mock_session.execute = AsyncMock(return_value=mock_result)
 
     # Викликаємо функцію
     result = await contact_repository.update_contact(
@@ -126,11 +157,11 @@ async def test_update_contact(contact_repository, mock_session, user):
     assert result.email == "john@example.com"
     assert result.extra_info == "New info"
 
+    mock_session.execute.assert_called_once()
     mock_session.commit.assert_called_once()
-    mock_session.refresh.assert_called_once_with(existing_contact)
+    mock_session.refresh.assert_not_called()
 
 
-@pytest.mark.asyncio
 async def test_delete_contact(contact_repository, mock_session, user):
     existing_contact = Contact(
         id=1,
@@ -153,7 +184,6 @@ async def test_delete_contact(contact_repository, mock_session, user):
     mock_session.commit.assert_called_once()
 
 
-@pytest.mark.asyncio
 async def test_search_contacts_with_all_fields(contact_repository, mock_session, user):
     # Arrange
     query_contacts = [
@@ -180,7 +210,29 @@ async def test_search_contacts_with_all_fields(contact_repository, mock_session,
     mock_session.execute.assert_called_once()
 
 
-@pytest.mark.asyncio
+async def test_search_contacts_batch(contact_repository, mock_session, user):
+    query_contacts = [
+        Contact(id=1, first_name="Alice", user_id=user.id),
+        Contact(id=3, first_name="Bob", user_id=user.id),
+    ]
+
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = query_contacts
+    mock_session.execute = AsyncMock(return_value=mock_result)
+
+    result = await contact_repository.search_contacts_batch(user=user, ids=[1, 3])
+
+    assert [contact.id for contact in result] == [1, 3]
+    mock_session.execute.assert_called_once()
+
+    # Усі ID передаються одним параметром-масивом, тож PostgreSQL використовує один план
+    compiled = mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    where_sql = str(compiled).split("WHERE", 1)[1]
+    assert "contacts.user_id = %(user_id_1)s" in where_sql
+    assert "contacts.id = ANY (%(param_1)s)" in where_sql
+    assert compiled.params == {"user_id_1": user.id, "param_1": [1, 3]}
+
+
 async def test_get_contacts_birthday_soon(contact_repository, mock_session, user):
     # Arrange
     today = datetime.today()
@@ -1,17 +1,24 @@
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from sqlalchemy import select
 
 from src.database.models import User, UserRole
-from tests.conftest import TestingSessionLocal
+from src.services.auth import create_email_token, create_reset_token
+from src.services.hash import legacy_pwd_context
+
+# Логін перевіряє користувача, зареєстрованого попередніми тестами модуля
+pytestmark = [
+    pytest.mark.xdist_group("auth"),
+    pytest.mark.usefixtures("db_transaction", "warm_app"),
+]
 
 user_data = {"username": "agent007", "email": "agent007@gmail.com", "password": "12345678", "role": "USER"}
 
-def test_signup(client, monkeypatch):
+async def test_signup(client, monkeypatch):
     mock_send_email = Mock()
     monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
-    response = client.post("api/auth/register", json=user_data)
+    response = await client.post("api/auth/register", json=user_data)
     assert response.status_code == 201, response.text
     data = response.json()
     assert data["username"] == user_data["username"]
@@ -20,55 +27,146 @@ def test_signup(client, monkeypatch):
     assert "avatar" in data
     assert data["role"] == user_data["role"]
 
-def test_repeat_signup(client, monkeypatch):
+async def test_repeat_signup(client, monkeypatch):
     mock_send_email = Mock()
     monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
-    response = client.post("api/auth/register", json=user_data)
+    response = await client.post("api/auth/register", json=user_data)
     assert response.status_code == 409, response.text
     data = response.json()
     assert data["detail"] == "Користувач з таким email вже існує"
 
-def test_not_confirmed_login(client):
-    response = client.post("api/auth/login",
-                           data={"username": user_data.get("username"), "password": user_data.get("password")})
+async def test_signup_username_taken(client, monkeypatch):
+    mock_send_email = Mock()
+    monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
+    response = await client.post("api/auth/register", json={**user_data, "email": "other007@gmail.com"})
+    assert response.status_code == 409, response.text
+    data = response.json()
+    assert data["detail"] == "Користувач з таким іменем вже існує"
+    mock_send_email.assert_not_called()
+
+async def test_not_confirmed_login(client):
+    response = await client.post("api/auth/login",
+                                 data={"username": user_data.get("username"), "password": user_data.get("password")})
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Електронна адреса не підтверджена"
 
-@pytest.mark.asyncio
-async def test_login(client):
-    async with TestingSessionLocal() as session:
-        current_user = await session.execute(select(User).where(User.email == user_data.get("email")))
-        current_user = current_user.scalar_one_or_none()
-        if current_user:
-            current_user.confirmed = True
-            await session.commit()
-
-    response = client.post("api/auth/login",
-                           data={"username": user_data.get("username"), "password": user_data.get("password")})
+async def test_request_email_unknown_user(client, monkeypatch):
+    mock_send_email = Mock()
+    monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
+    response = await client.post("api/auth/request_email", json={"email": "unknown@gmail.com"})
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Перевірте свою електронну пошту для підтвердження"
+    mock_send_email.assert_not_called()
+
+async def test_request_email_not_confirmed(client, monkeypatch):
+    mock_send_email = Mock()
+    monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
+    # Обмеження частоти листів перевіряється окремо від Redis, тож відправку дозволяємо
+    monkeypatch.setattr("src.api.auth.redis_client.set", AsyncMock(return_value=True))
+    response = await client.post("api/auth/request_email", json={"email": user_data["email"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Перевірте свою електронну пошту для підтвердження"
+    mock_send_email.assert_called_once()
+    assert mock_send_email.call_args.args[:2] == (user_data["email"], user_data["username"])
+
+async def test_login(client, db_session):
+    current_user = await db_session.execute(select(User).where(User.email == user_data.get("email")))
+    current_user = current_user.scalar_one_or_none()
+    if current_user:
+        current_user.confirmed = True
+        await db_session.commit()
+
+    response = await client.post("api/auth/login",
+                                 data={"username": user_data.get("username"), "password": user_data.get("password")})
     assert response.status_code == 200, response.text
     data = response.json()
     assert "access_token" in data
     assert "token_type" in data
 
-def test_wrong_password_login(client):
-    response = client.post("api/auth/login",
-                           data={"username": user_data.get("username"), "password": "password"})
+async def test_wrong_password_login(client):
+    response = await client.post("api/auth/login",
+                                 data={"username": user_data.get("username"), "password": "password"})
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Неправильний логін або пароль"
 
-def test_wrong_username_login(client):
-    response = client.post("api/auth/login",
-                           data={"username": "username", "password": user_data.get("password")})
+async def test_wrong_username_login(client):
+    response = await client.post("api/auth/login",
+                                 data={"username": "username", "password": user_data.get("password")})
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Неправильний логін або пароль"
 
-def test_validation_error_login(client):
-    response = client.post("api/auth/login",
-                           data={"password": user_data.get("password")})
+async def test_validation_error_login(client):
+    response = await client.post("api/auth/login",
+                                 data={"password": user_data.get("password")})
     assert response.status_code == 422, response.text
     data = response.json()
     assert "detail" in data
 
+legacy_user_data = {"username": "legacy_bond", "email": "legacy_bond@gmail.com", "password": "87654321"}
+
+async def test_legacy_bcrypt_login(client, db_session):
+    # Користувач зі старим bcrypt-хешем, створеним до переходу на Argon2id
+    db_session.add(User(
+        username=legacy_user_data["username"],
+        email=legacy_user_data["email"],
+        hashed_password=legacy_pwd_context.hash(legacy_user_data["password"]),
+        confirmed=True,
+        avatar="<https://twitter.com/gravatar>",
+    ))
+    await db_session.commit()
+
+    response = await client.post("api/auth/login",
+                                 data={"username": legacy_user_data["username"], "password": "password"})
+    assert response.status_code == 401, response.text
+    assert response.json()["detail"] == "Неправильний логін або пароль"
+
+    response = await client.post("api/auth/login",
+                                 data={"username": legacy_user_data["username"],
+                                       "password": legacy_user_data["password"]})
+    assert response.status_code == 200, response.text
+    assert "access_token" in response.json()
+
+    # Після успішного логіну хеш перезаписано в Argon2id
+    hashed_password = await db_session.scalar(
+        select(User.hashed_password).where(User.username == legacy_user_data["username"])
+    )
+    assert hashed_password.startswith("$argon2id$")
+
+unconfirmed_user_data = {"username": "moneypenny", "email": "moneypenny@gmail.com", "password": "11223344"}
+
+async def test_confirmed_email(client, db_session):
+    db_session.add(User(
+        username=unconfirmed_user_data["username"],
+        email=unconfirmed_user_data["email"],
+        hashed_password="not-used",
+        confirmed=False,
+        avatar="<https://twitter.com/gravatar>",
+    ))
+    await db_session.commit()
+
+    # Токен скидання пароля має інший salt і не підтверджує пошту
+    response = await client.get(f"api/auth/confirmed_email/{create_reset_token(unconfirmed_user_data['email'])}")
+    assert response.status_code == 422, response.text
+
+    token = create_email_token(unconfirmed_user_data["email"])
+    response = await client.get(f"api/auth/confirmed_email/{token}")
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Електронну пошту підтверджено"
+
+    confirmed = await db_session.scalar(
+        select(User.confirmed).where(User.email == unconfirmed_user_data["email"])
+    )
+    assert confirmed is True
+
+    response = await client.get(f"api/auth/confirmed_email/{token}")
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Ваша електронна пошта вже підтверджена"
+
+async def test_reset_password_rejects_confirmation_token(client):
+    response = await client.get("api/auth/reset-password",
+                                params={"token": create_email_token(unconfirmed_user_data["email"])})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid or expired token"
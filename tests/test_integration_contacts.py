@@ -1,113 +1,136 @@
+from datetime import date
+from types import MappingProxyType
+
 import pytest
+from sqlalchemy import select
+
+from src.database.models import Contact, User
 
-contact_example = {
+# Під xdist модуль виконується на одному воркері разом зі своїм токеном і транзакцією
+pytestmark = [
+    pytest.mark.xdist_group("contacts"),
+    pytest.mark.usefixtures("db_transaction", "warm_app"),
+]
+
+contact_example = MappingProxyType({
     "first_name": "John",
     "last_name": "Doe",
     "email": "john.doe@example.com",
     "phone": "+380501234567",
     "birthday": "1990-01-01",
-    "description": "Test contact"
-}
+    "extra_info": "Test contact"
+})
 
+updated_contact_example = MappingProxyType({
+    "first_name": "Updated",
+    "last_name": "User",
+    "email": "updated@example.com",
+    "phone": "+380507777777",
+    "birthday": "1995-05-05",
+    "extra_info": "Updated"
+})
 
-@pytest.mark.asyncio
-async def test_create_contact(client, get_token):
-    response = client.post(
-        "/contacts/",
-        json=contact_example,
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
-    assert response.status_code == 201
-    data = response.json()
-    assert data["email"] == contact_example["email"]
-    contact_example["id"] = data["id"]  # для наступних тестів
 
+def expected_response(example):
+    # birthday у відповіді серіалізується як datetime, тому порівнюємо його окремо від решти полів
+    return MappingProxyType({key: value for key, value in example.items() if key != "birthday"})
 
-@pytest.mark.asyncio
-async def test_read_contacts(client, get_token):
-    response = client.get(
-        "/contacts/",
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert isinstance(data, list)
-    assert any(contact["email"] == contact_example["email"] for contact in data)
 
+expected_contact = expected_response(contact_example)
+expected_updated_contact = expected_response(updated_contact_example)
 
-@pytest.mark.asyncio
-async def test_search_contacts(client, get_token):
-    response = client.get(
-        f"/contacts/search?email={contact_example['email']}",
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
-    assert response.status_code == 200
-    data = response.json()
-    assert len(data) > 0
-    assert data[0]["email"] == contact_example["email"]
-
-
-@pytest.mark.asyncio
-async def test_update_contact(client, get_token):
-    # Спочатку створюємо контакт
-    contact_data = {
-        "first_name": "Test",
-        "last_name": "User",
-        "email": "testuser@example.com",
-        "phone": "+380501112233",
-        "birthday": "1995-05-05",
-        "description": "Initial"
-    }
-    response = client.post(
-        "/contacts/",
-        json=contact_data,
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
+
+def response_subset(data, expected):
+    return {key: data[key] for key in expected}
+
+
+async def test_contact_crud_cycle(client, get_token, subtests):
+    # Увесь CRUD-цикл в одному тесті: фікстури і токен отримуються один раз,
+    # а subtests показують, на якому саме кроці стався збій
+    headers = {"Authorization": f"Bearer {get_token}"}
+
+    response = await client.post("/contacts/", json=dict(contact_example), headers=headers)
     assert response.status_code == 201
-    contact = response.json()
-    contact_id = contact["id"]  # <- тут правильне отримання id
-
-    # Оновлюємо контакт
-    updated_data = {
-        "first_name": "Updated",
-        "last_name": "User",
-        "email": "updated@example.com",
-        "phone": "+380507777777",
-        "birthday": "1995-05-05",
-        "description": "Updated"
-    }
-
-    response = client.put(
-        f"/contacts/{contact_id}",
-        json=updated_data,
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
-    assert response.status_code == 200
-    updated_contact = response.json()
-    assert updated_contact["first_name"] == "Updated"
-
-
-@pytest.mark.asyncio
-async def test_delete_contact(client, get_token):
-    # Створюємо контакт
-    contact_data = {
-        "first_name": "Delete",
-        "last_name": "Me",
-        "email": "deleteme@example.com",
-        "phone": "+380509999999",
-        "birthday": "1992-02-02",
-        "description": "Delete me"
-    }
-    response = client.post(
-        "/contacts/",
-        json=contact_data,
-        headers={"Authorization": f"Bearer {get_token}"},
-    )
-    contact_id = response.json()["id"]  # ← знову беремо id
+    created_contact = response.json()
+    contact_id = created_contact["id"]
+
+    with subtests.test(msg="create"):
+        assert response_subset(created_contact, expected_contact) == expected_contact
+        assert created_contact["birthday"].startswith(contact_example["birthday"])
+
+    with subtests.test(msg="read"):
+        response = await client.get("/contacts/", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert isinstance(data, list)
+        assert any(contact["id"] == contact_id for contact in data)
+
+    with subtests.test(msg="search"):
+        response = await client.get(f"/contacts/search?email={contact_example['email']}", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) > 0
+        assert response_subset(data[0], expected_contact) == expected_contact
+
+    with subtests.test(msg="update"):
+        response = await client.put(f"/contacts/{contact_id}", json=dict(updated_contact_example), headers=headers)
+        assert response.status_code == 200
+        updated_contact = response.json()
+        assert response_subset(updated_contact, expected_updated_contact) == expected_updated_contact
+        assert updated_contact["birthday"].startswith(updated_contact_example["birthday"])
+
+    with subtests.test(msg="delete"):
+        response = await client.delete(f"/contacts/{contact_id}", headers=headers)
+        assert response.status_code == 200
+        deleted_contact = response.json()
+        assert deleted_contact["id"] == contact_id
+        assert response_subset(deleted_contact, expected_updated_contact) == expected_updated_contact
+
 
-    # Видаляємо
-    response = client.delete(
-        f"/contacts/{contact_id}",
-        headers={"Authorization": f"Bearer {get_token}"},
+# Дні народження навколо Нового року; first_name — це MM-DD, щоб легко порівнювати вибірку
+birthday_dates = [
+    date(1990, 12, 27), date(1985, 12, 28), date(1992, 12, 31), date(2000, 1, 1),
+    date(1991, 1, 2), date(1988, 1, 3), date(1995, 1, 4), date(1993, 1, 5),
+    date(1987, 1, 10), date(1999, 1, 11), date(1994, 1, 20), date(1996, 2, 5),
+]
+
+
+def frozen_date(today):
+    # Підміна date у репозиторії, щоб date.today() повертав заданий день
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    return FrozenDate
+
+
+async def test_contacts_birthday_soon_window(client, get_token, db_session, monkeypatch, subtests):
+    user = (await db_session.execute(select(User).where(User.username == "deadpool"))).scalar_one()
+    db_session.add_all(
+        Contact(
+            first_name=birthday.strftime("%m-%d"),
+            last_name="Birthday",
+            email=f"{birthday:%m%d}@birthday.test",
+            phone="+380500000000",
+            birthday=birthday,
+            user_id=user.id,
+        )
+        for birthday in birthday_dates
     )
-    assert response.status_code == 200
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {get_token}"}
+
+    cases = [
+        # Вікно в межах місяця: решта січневих днів народження сюди не потрапляє
+        (date(2025, 1, 3), ["01-03", "01-04", "01-05", "01-10"]),
+        # Вікно через кінець року
+        (date(2024, 12, 28), ["01-01", "01-02", "01-03", "01-04", "12-28", "12-31"]),
+    ]
+    for today, expected in cases:
+        with subtests.test(msg=str(today)):
+            monkeypatch.setattr("src.repository.contacts.date", frozen_date(today))
+            response = await client.get("/contacts/birthday-soon", headers=headers)
+            assert response.status_code == 200, response.text
+            names = sorted(contact["first_name"] for contact in response.json() if contact["last_name"] == "Birthday")
+            assert names == expected
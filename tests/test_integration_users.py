@@ -1,12 +1,16 @@
 from unittest.mock import patch
 
+import pytest
+
 from conftest import test_user
 
+pytestmark = pytest.mark.usefixtures("db_transaction", "warm_app")
+
 
-def test_get_me(client, get_token):
+async def test_get_me(client, get_token):
     token = get_token
     headers = {"Authorization": f"Bearer {token}"}
-    response = client.get("api/users/me", headers=headers)
+    response = await client.get("api/users/me", headers=headers)
     assert response.status_code == 200, response.text
     data = response.json()
     assert data["username"] == test_user["username"]
@@ -15,7 +19,7 @@ def test_get_me(client, get_token):
 
 
 @patch("src.api.users.UploadFileService.upload_file")
-def test_update_avatar_user(mock_upload_file, client, get_token):
+async def test_update_avatar_user(mock_upload_file, client, get_token):
     # Мокаємо відповідь від сервісу завантаження файлів
     fake_url = "http://example.com/avatar.jpg"
     mock_upload_file.return_value = fake_url
@@ -27,7 +31,7 @@ def test_update_avatar_user(mock_upload_file, client, get_token):
     file_data = {"file": ("avatar.jpg", b"fake image content", "image/jpeg")}
 
     # Відправка PATCH-запиту
-    response = client.patch("/api/users/avatar", headers=headers, files=file_data)
+    response = await client.patch("/api/users/avatar", headers=headers, files=file_data)
 
     # Перевірка, що запит був успішним
     assert response.status_code == 200, response.text
@@ -0,0 +1,48 @@
+import logging
+import logging.handlers
+
+import pytest
+
+from src.conf import log
+
+
+@pytest.fixture
+def root_logger(monkeypatch):
+    # Кожен тест налаштовує логування з нуля і повертає кореневий логер як було
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(log, "_listener", None)
+    root.setLevel(logging.WARNING)
+    yield root
+    root.handlers = saved_handlers
+    root.setLevel(saved_level)
+
+
+def test_setup_logging_keeps_configured_handlers_and_level(root_logger):
+    # pytest додає свої обробники вже після фікстур, тому задаємо їх у самому тесті
+    configured = logging.StreamHandler()
+    root_logger.handlers = [configured]
+
+    listener = log.setup_logging()
+
+    assert listener.handlers == (configured,)
+    assert [type(handler) for handler in root_logger.handlers] == [logging.handlers.QueueHandler]
+    assert root_logger.level == logging.WARNING
+
+
+def test_setup_logging_sets_level_when_given(root_logger):
+    log.setup_logging(logging.DEBUG)
+
+    assert root_logger.level == logging.DEBUG
+
+
+def test_setup_logging_reuses_queue_and_listener(root_logger):
+    configured = logging.StreamHandler()
+    root_logger.handlers = [configured]
+
+    first = log.setup_logging()
+    second = log.setup_logging()
+
+    assert second is first
+    assert first.handlers == (configured,)
+    assert len(root_logger.handlers) == 1
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import time
+from email.message import EmailMessage
+
+import aiosmtplib
+import pytest
+
+from src.conf.config import config
+from src.services import mail
+
+
+class FakeConnection:
+    """Заміна SMTPConnection: запам'ятовує адресатів, а перші failures відправок завершує помилкою."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+        self.closed = False
+
+    async def send_message(self, message):
+        self.sent.append(message["To"])
+        if len(self.sent) <= self.failures:
+            raise RuntimeError("SMTP is down")
+
+    def close(self):
+        self.closed = True
+
+
+def make_message(email):
+    message = EmailMessage()
+    message["To"] = email
+    return message
+
+
+@pytest.fixture
+def mail_queue(monkeypatch):
+    # Своя черга для кожного тесту, щоб вона не прив'язувалась до чужого event loop
+    queue = asyncio.Queue()
+    monkeypatch.setattr(mail, "mail_queue", queue)
+    return queue
+
+
+def test_build_message_headers():
+    message = mail.build_message(
+        "Confirm your email",
+        "user@example.com",
+        "verify_email.html",
+        {"host": "http://test/", "username": "testuser", "token": "token123"},
+    )
+
+    assert message["Subject"] == "Confirm your email"
+    assert message["From"] == f"{config.MAIL_FROM_NAME} <{config.MAIL_FROM}>"
+    assert message["To"] == "user@example.com"
+    assert message.get_content_type() == "text/html"
+    assert "Hi testuser," in message.get_content()
+
+
+async def test_send_email_enqueues_rendered_message(mail_queue, monkeypatch):
+    monkeypatch.setattr(mail, "create_email_token", lambda email: "token123")
+
+    await mail.send_email("user@example.com", "testuser", "http://test/")
+
+    assert mail_queue.qsize() == 1
+    message = mail_queue.get_nowait()
+    assert message["To"] == "user@example.com"
+    assert message["Subject"] == "Confirm your email"
+    assert "http://test/api/auth/confirmed_email/token123" in message.get_content()
+
+
+async def test_mail_worker_survives_failed_message(mail_queue, monkeypatch, caplog):
+    connection = FakeConnection(failures=1)
+    monkeypatch.setattr(mail, "smtp_connection", connection)
+    mail_queue.put_nowait(make_message("first@example.com"))
+    mail_queue.put_nowait(make_message("second@example.com"))
+
+    worker = asyncio.create_task(mail.mail_worker())
+    await mail_queue.join()
+
+    assert connection.sent == ["first@example.com", "second@example.com"]
+    assert not worker.done()
+    assert "Error sending email to first@example.com" in caplog.text
+
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+    assert connection.closed
+
+
+async def test_start_mail_worker_moves_pending_messages_to_a_new_queue(mail_queue, monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(mail, "smtp_connection", connection)
+    mail_queue.put_nowait(make_message("pending@example.com"))
+
+    worker = mail.start_mail_worker()
+    await mail.mail_queue.join()
+
+    assert mail.mail_queue is not mail_queue
+    assert connection.sent == ["pending@example.com"]
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+
+async def test_on_mail_worker_done_logs_crash(caplog):
+    async def crash():
+        raise RuntimeError("worker crashed")
+
+    task = asyncio.create_task(crash())
+    await asyncio.wait([task])
+
+    with caplog.at_level(logging.ERROR, logger=mail.logger.name):
+        mail.on_mail_worker_done(task)
+
+    assert "Mail worker stopped unexpectedly" in caplog.text
+
+
+async def test_on_mail_worker_done_ignores_cancellation(caplog):
+    task = asyncio.create_task(asyncio.sleep(60))
+    task.cancel()
+    await asyncio.wait([task])
+
+    with caplog.at_level(logging.ERROR, logger=mail.logger.name):
+        mail.on_mail_worker_done(task)
+
+    assert caplog.records == []
+
+
+class FakeSMTP:
+    """Заміна aiosmtplib.SMTP: записує виклики і може завершити NOOP чи відправку обривом з'єднання."""
+
+    def __init__(self, connected=False, noop_fails=False, send_failures=0):
+        self.is_connected = connected
+        self.noop_fails = noop_fails
+        self.send_failures = send_failures
+        self.calls = []
+
+    async def connect(self):
+        self.calls.append("connect")
+        self.is_connected = True
+
+    async def noop(self):
+        self.calls.append("noop")
+        if self.noop_fails:
+            raise aiosmtplib.SMTPServerDisconnected("Server closed the connection")
+
+    async def send_message(self, message):
+        self.calls.append("send")
+        if self.send_failures:
+            self.send_failures -= 1
+            raise aiosmtplib.SMTPServerDisconnected("Server closed the connection")
+
+    def close(self):
+        self.calls.append("close")
+        self.is_connected = False
+
+
+def make_connection(client, idle_seconds=0):
+    connection = mail.SMTPConnection()
+    connection.client = client
+    connection.last_used = time.monotonic() - idle_seconds
+    return connection
+
+
+async def test_smtp_connection_connects_lazily():
+    client = FakeSMTP()
+    connection = make_connection(client)
+
+    await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["connect", "send"]
+
+
+async def test_smtp_connection_skips_noop_when_recently_used():
+    client = FakeSMTP(connected=True)
+    connection = make_connection(client)
+
+    await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["send"]
+
+
+async def test_smtp_connection_checks_idle_connection_with_noop():
+    client = FakeSMTP(connected=True)
+    connection = make_connection(client, idle_seconds=120)
+
+    await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["noop", "send"]
+    assert time.monotonic() - connection.last_used < connection.idle_check_seconds
+
+
+async def test_smtp_connection_reconnects_when_noop_fails():
+    client = FakeSMTP(connected=True, noop_fails=True)
+    connection = make_connection(client, idle_seconds=120)
+
+    await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["noop", "close", "connect", "send"]
+
+
+async def test_smtp_connection_retries_once_after_disconnect_mid_send():
+    client = FakeSMTP(connected=True, send_failures=1)
+    connection = make_connection(client)
+
+    await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["send", "close", "connect", "send"]
+
+
+async def test_smtp_connection_gives_up_after_second_disconnect():
+    client = FakeSMTP(connected=True, send_failures=2)
+    connection = make_connection(client)
+
+    with pytest.raises(aiosmtplib.SMTPServerDisconnected):
+        await connection.send_message(make_message("user@example.com"))
+
+    assert client.calls == ["send", "close", "connect", "send"]
+
+
+def test_smtp_connection_close_only_when_connected():
+    client = FakeSMTP()
+    connection = make_connection(client)
+
+    connection.close()
+    assert client.calls == []
+
+    client.is_connected = True
+    connection.close()
+    assert client.calls == ["close"]
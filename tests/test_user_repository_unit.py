@@ -1,25 +1,59 @@
+from dataclasses import dataclass
 from typing import Literal
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
 from src.repository.users import UserRepository
-from src.database.models import User, UserRole
+from src.database.models import UserRole
 from src.schemas import UserCreate
 
 
-@pytest.fixture
-def mock_session():
-    return AsyncMock()
+@dataclass(slots=True)
+class UserStub:
+    """Легка заміна ORM-моделі User: репозиторій лише повертає об'єкт і читає атрибути."""
+    id: int
+    email: str
+    confirmed: bool = False
+    avatar: str | None = None
+    username: str | None = None
 
 
-@pytest.fixture
-def user_repo(mock_session):
-    return UserRepository(mock_session)
+class FakeResult:
+    """Мінімальна заміна Result, яку повертає session.execute()."""
 
+    def __init__(self, value):
+        self.value = value
 
-@pytest.fixture
+    def scalar_one(self):
+        return self.value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def one_or_none(self):
+        return self.value
+
+    def all(self):
+        return self.value
+
+
+class FakeAsyncSession:
+    """Заміна AsyncSession з наперед створеними моками методів, які викликає репозиторій."""
+    add = MagicMock()
+    execute = AsyncMock()
+    commit = AsyncMock()
+    refresh = AsyncMock()
+    rollback = AsyncMock()
+
+    def reset_mock(self):
+        for method in (self.add, self.execute, self.commit, self.refresh, self.rollback):
+            method.reset_mock(return_value=True)
+
+
+@pytest.fixture(scope="session")
 def user_create_data():
+    # Лише читається тестами; для змін використовуйте user_create_data.model_copy()
     return UserCreate(
         username="testuser",
         email="test@example.com",
@@ -28,76 +62,99 @@ def user_create_data():
     )
 
 
-@pytest.mark.asyncio
-async def test_create_user(user_repo, user_create_data, mock_session):
-    mock_session.add = MagicMock()
-    mock_session.commit = AsyncMock()
-    mock_session.refresh = AsyncMock()
-
-    user = await user_repo.create_user(user_create_data, avatar="http://avatar.com/avatar.png")
-
-    assert user.username == user_create_data.username
-    assert user.email == user_create_data.email
-    assert user.avatar == "http://avatar.com/avatar.png"
-    mock_session.add.assert_called_once()
-    mock_session.commit.assert_called_once()
-    mock_session.refresh.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_get_user_by_email_found(user_repo, mock_session):
-    email = "test@example.com"
-    fake_user = User(id=1, email=email)
-
-    # Мокаємо результат, який повертає session.execute()
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = fake_user
-    mock_session.execute = AsyncMock(return_value=mock_result)
-
-    result = await user_repo.get_user_by_email(email)
+class TestUserRepository:
+    @pytest.fixture(scope="class")
+    def mock_session(self):
+        return FakeAsyncSession()
+
+    @pytest.fixture(scope="class")
+    def user_repo(self, mock_session):
+        return UserRepository(mock_session)
+
+    @pytest.fixture(autouse=True)
+    def reset_mocks(self, mock_session):
+        # Сесія спільна для класу, тож перед кожним тестом скидаємо виклики і результати
+        mock_session.reset_mock()
+
+    async def test_create_user(self, user_repo, user_create_data, mock_session):
+        created_user = UserStub(
+            id=1,
+            username=user_create_data.username,
+            email=user_create_data.email,
+            avatar="http://avatar.com/avatar.png",
+        )
+        mock_session.execute.return_value = FakeResult(created_user)
+
+        user = await user_repo.create_user(user_create_data, avatar="http://avatar.com/avatar.png")
+
+        assert user.username == user_create_data.username
+        assert user.email == user_create_data.email
+        assert user.avatar == "http://avatar.com/avatar.png"
+        mock_session.execute.assert_called_once()
+        mock_session.commit.assert_called_once()
+        mock_session.refresh.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "email,returned",
+        [
+            ("test@example.com", UserStub(id=1, email="test@example.com")),
+            ("notfound@example.com", None),
+        ],
+    )
+    async def test_get_user_by_email(self, user_repo, mock_session, email, returned):
+        # Мокаємо результат, який повертає session.execute()
+        mock_session.execute.return_value = FakeResult(returned)
 
-    assert result == fake_user
-    mock_session.execute.assert_called_once()
+        result = await user_repo.get_user_by_email(email)
 
+        assert result == returned
+        mock_session.execute.assert_called_once()
 
-@pytest.mark.asyncio
-async def test_get_user_by_email_not_found(user_repo, mock_session):
-    email = "notfound@example.com"
+    async def test_confirmed_email(self, mock_session, user_repo, monkeypatch):
+        monkeypatch.setattr(user_repo, "get_user_by_email", AsyncMock())
 
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = None
-    mock_session.execute = AsyncMock(return_value=mock_result)
+        await user_repo.confirmed_email("test@example.com")
 
-    result = await user_repo.get_user_by_email(email)
+        user_repo.get_user_by_email.assert_not_called()
+        mock_session.execute.assert_called_once()
+        mock_session.commit.assert_called_once()
 
-    assert result is None
-    mock_session.execute.assert_called_once()
+    async def test_update_avatar_url(self, mock_session, user_repo):
+        updated_user = UserStub(id=1, email="test@example.com", avatar="new_url.jpg")
+        mock_session.execute.return_value = FakeResult(updated_user)
 
+        result = await user_repo.update_avatar_url("test@example.com", "new_url.jpg")
 
-@pytest.mark.asyncio
-async def test_confirmed_email(mock_session, user_repo):
-    mock_user = MagicMock()
-    mock_user.email = "test@example.com"
-    mock_user.confirmed = False
+        assert result.avatar == "new_url.jpg"
+        mock_session.execute.assert_called_once()
+        mock_session.commit.assert_called_once()
+        mock_session.refresh.assert_not_called()
 
-    user_repo.get_user_by_email = AsyncMock(return_value=mock_user)
+    async def test_get_user_by_email_or_username(self, user_repo, mock_session):
+        rows = [("test@example.com", "otheruser")]
 
-    await user_repo.confirmed_email("test@example.com")
+        mock_session.execute.return_value = FakeResult(rows)
 
-    assert mock_user.confirmed is True
-    mock_session.commit.assert_called_once()
+        result = await user_repo.get_user_by_email_or_username("test@example.com", "testuser")
 
+        assert result == rows
+        mock_session.execute.assert_called_once()
+        stmt = mock_session.execute.call_args.args[0]
+        assert [column.name for column in stmt.selected_columns] == ["email", "username"]
+        assert " OR " in str(stmt.whereclause)
+        params = stmt.compile().params.values()
+        assert "test@example.com" in params
+        assert "testuser" in params
 
-@pytest.mark.asyncio
-async def test_update_avatar_url(mock_session, user_repo):
-    mock_user = MagicMock()
-    mock_user.email = "test@example.com"
-    mock_user.avatar = "old_url.jpg"
+    async def test_get_confirmation_status(self, user_repo, mock_session):
+        row = ("testuser", False)
 
-    user_repo.get_user_by_email = AsyncMock(return_value=mock_user)
+        mock_session.execute.return_value = FakeResult(row)
 
-    result = await user_repo.update_avatar_url("test@example.com", "new_url.jpg")
+        result = await user_repo.get_confirmation_status("test@example.com")
 
-    assert result.avatar == "new_url.jpg"
-    mock_session.commit.assert_called_once()
-    mock_session.refresh.assert_called_once_with(mock_user)
+        assert result == row
+        mock_session.execute.assert_called_once()
+        stmt = mock_session.execute.call_args.args[0]
+        assert [column.name for column in stmt.selected_columns] == ["username", "confirmed"]
+        assert list(stmt.compile().params.values()) == ["test@example.com"]